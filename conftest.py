@@ -0,0 +1,7 @@
+import os
+
+# pytest-xdist workers only report back through the controller, so the
+# "preserved at" notices printed under GH_KEEP_TMP get lost and the
+# directories would just leak; make workers clean up after themselves.
+if os.getenv('PYTEST_XDIST_WORKER'):
+    os.environ['GH_KEEP_TMP'] = ''
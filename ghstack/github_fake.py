@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 
+import functools
 import os.path
 import re
 from dataclasses import dataclass  # Oof! Python 3.7 only!!
-from typing import Any, Dict, List, NewType, Optional, Sequence, cast
+from typing import Any, Dict, List, NewType, Optional, Sequence, Tuple, cast
 
 import graphql
 from typing_extensions import TypedDict
@@ -167,7 +168,7 @@ class Repository(Node):
             id=state.next_id(),
             # TODO: this upstream_sh hardcode wrong, but ok for now
             # because we only have one repo
-            oid=GitObjectID(state.upstream_sh.git('rev-parse', refName)),
+            oid=GitObjectID(state.upstream_sh.rev_parse_batch(refName)),
             _repository=self.id,
         )
         ref = Ref(
@@ -258,6 +259,24 @@ set_is_type_of('Repository', Repository)
 set_is_type_of('PullRequest', PullRequest)
 
 
+# Parsing and validating a query against the (large) GitHub schema
+# costs far more than executing it against our tiny in-memory state,
+# and the same handful of queries get sent over and over, so only do
+# it once per distinct query.
+@functools.lru_cache(maxsize=None)
+def parse_query(query: str) -> Tuple[Optional[graphql.DocumentNode],
+                                     Tuple[graphql.GraphQLError, ...]]:
+    try:
+        document = graphql.parse(query)
+    except graphql.GraphQLError as e:
+        return None, (e,)
+    return document, tuple(graphql.validate(GITHUB_SCHEMA, document))
+
+
+RE_PULLS = re.compile(r'^repos/([^/]+)/([^/]+)/pulls$')
+RE_REPO_OR_PULL = re.compile(r'^repos/([^/]+)/([^/]+)(?:/pulls/([^/]+))?$')
+
+
 class FakeGitHubEndpoint(ghstack.github.GitHubEndpoint):
     state: GitHubState
 
@@ -267,22 +286,29 @@ class FakeGitHubEndpoint(ghstack.github.GitHubEndpoint):
         self.state = GitHubState(upstream_sh)
 
     def graphql(self, query: str, **kwargs: Any) -> Any:
-        r = graphql.graphql_sync(
-            schema=GITHUB_SCHEMA,
-            source=query,
-            root_value=self.state.root,
-            context_value=self.state,
-            variable_values=kwargs)
-        if r.errors:
+        document, errors = parse_query(query)
+        data = None
+        if document is not None and not errors:
+            r = graphql.execute(
+                schema=GITHUB_SCHEMA,
+                document=document,
+                root_value=self.state.root,
+                context_value=self.state,
+                variable_values=kwargs)
+            # Our resolvers are all synchronous
+            assert isinstance(r, graphql.ExecutionResult)
+            data = r.data
+            errors = tuple(r.errors or ())
+        if errors:
             # The GraphQL implementation loses all the stack traces!!!
             # D:  You can 'recover' them by deleting the
             # 'except Exception as error' from GraphQL-core-next; need
             # to file a bug report
             raise RuntimeError("GraphQL query failed with errors:\n\n{}"
-                               .format("\n".join(str(e) for e in r.errors)))
+                               .format("\n".join(str(e) for e in errors)))
         # The top-level object isn't indexable by strings, but
         # everything underneath is, oddly enough
-        return {'data': r.data}
+        return {'data': data}
 
     def push_hook(self, refNames: Sequence[str]) -> None:
         self.state.push_hook(refNames)
@@ -349,12 +375,12 @@ class FakeGitHubEndpoint(ghstack.github.GitHubEndpoint):
 
     def rest(self, method: str, path: str, **kwargs: Any) -> Any:
         if method == 'post':
-            m = re.match(r'^repos/([^/]+)/([^/]+)/pulls$', path)
+            m = RE_PULLS.match(path)
             if m:
                 return self._create_pull(m.group(1), m.group(2),
                                          cast(CreatePullRequestInput, kwargs))
         elif method == 'patch':
-            m = re.match(r'^repos/([^/]+)/([^/]+)(?:/pulls/([^/]+))?$', path)
+            m = RE_REPO_OR_PULL.match(path)
             if m:
                 owner, name, number = m.groups()
                 if number is not None:
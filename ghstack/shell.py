@@ -36,6 +36,21 @@ K = TypeVar('K')
 V = TypeVar('V')
 
 
+# Extra git configuration used in testing mode.  It is passed through
+# the environment (GIT_CONFIG_COUNT, git 2.31+) rather than as -c flags,
+# so that logged commands stay the same; older versions of git just
+# ignore it.
+TESTING_GIT_CONFIG: Dict[str, str] = {
+    # Test repositories are throwaway, so don't pay for durability
+    'core.fsync': 'none',
+    # ...nor for housekeeping after commits and fetches
+    'gc.auto': '0',
+    'maintenance.auto': 'false',
+    # ...nor for reflogs, which nothing in the tests reads back
+    'core.logAllRefUpdates': 'false',
+}
+
+
 def merge_dicts(x: Dict[K, V], y: Dict[K, V]) -> Dict[K, V]:
     z = x.copy()
     z.update(y)
@@ -62,6 +77,14 @@ class Shell(object):
     # The current Unix timestamp.  Only used during testing mode.
     testing_time: int
 
+    # Environment variables set for git commands in testing mode.  Built
+    # once (and kept up to date by test_tick) rather than on every call.
+    _testing_git_env: Dict[str, str]
+
+    # Long-running `git cat-file --batch` process used to look up
+    # objects without spawning a git per lookup; started on demand.
+    _cat_file: Optional['subprocess.Popen[bytes]']
+
     def __init__(self,
                  quiet: bool = False,
                  cwd: Optional[str] = None,
@@ -83,6 +106,30 @@ class Shell(object):
         self.quiet = quiet
         self.testing = testing
         self.testing_time = 1112911993
+        self._testing_git_env = {
+            # Some envvars to make things a little more script mode nice
+            "EDITOR": ":",
+            "GIT_MERGE_AUTOEDIT": "no",
+            "LANG": "C",
+            "LC_ALL": "C",
+            "PAGER": "cat",
+            "TZ": "UTC",
+            "TERM": "dumb",
+            # These are important so we get deterministic commit times
+            "GIT_AUTHOR_EMAIL": "author@example.com",
+            "GIT_AUTHOR_NAME": "A U Thor",
+            "GIT_COMMITTER_EMAIL": "committer@example.com",
+            "GIT_COMMITTER_NAME": "C O Mitter",
+            # Don't let the user's or the system's gitconfig affect tests
+            "GIT_CONFIG_GLOBAL": os.devnull,
+            "GIT_CONFIG_NOSYSTEM": "1",
+            "GIT_CONFIG_COUNT": str(len(TESTING_GIT_CONFIG)),
+        }
+        for i, (key, value) in enumerate(TESTING_GIT_CONFIG.items()):
+            self._testing_git_env["GIT_CONFIG_KEY_{}".format(i)] = key
+            self._testing_git_env["GIT_CONFIG_VALUE_{}".format(i)] = value
+        self._update_testing_dates()
+        self._cat_file = None
 
     def sh(self, *args: str,  # noqa: C901
            env: Optional[Dict[str, str]] = None,
@@ -192,8 +239,24 @@ class Shell(object):
             assert proc.returncode is not None
             return (proc.returncode, out, err)
 
-        loop = asyncio.get_event_loop()
-        returncode, out, err = loop.run_until_complete(run())
+        if stdout == subprocess.PIPE and stderr == subprocess.PIPE:
+            # Nothing needs to be streamed as it arrives, so skip the
+            # event loop and let subprocess collect the output.  This
+            # is noticeably cheaper per command, which adds up for the
+            # many short git commands run in testing mode.
+            proc = subprocess.run(
+                args,
+                stdin=None if input else stdin,
+                input=input.encode('utf-8') if input else None,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=self.cwd,
+                env=env,
+            )
+            returncode, out, err = proc.returncode, proc.stdout, proc.stderr
+        else:
+            loop = asyncio.get_event_loop()
+            returncode, out, err = loop.run_until_complete(run())
 
         # NB: Not debug; we always want to show this to user.
         if err:
@@ -246,25 +309,9 @@ class Shell(object):
             *args: Arguments to git
             **kwargs: Any valid kwargs for sh()
         """
-        env = kwargs.setdefault("env", {})
-        # Some envvars to make things a little more script mode nice
         if self.testing:
-            env.setdefault("EDITOR", ":")
-            env.setdefault("GIT_MERGE_AUTOEDIT", "no")
-            env.setdefault("LANG", "C")
-            env.setdefault("LC_ALL", "C")
-            env.setdefault("PAGER", "cat")
-            env.setdefault("TZ", "UTC")
-            env.setdefault("TERM", "dumb")
-            # These are important so we get deterministic commit times
-            env.setdefault("GIT_AUTHOR_EMAIL", "author@example.com")
-            env.setdefault("GIT_AUTHOR_NAME", "A U Thor")
-            env.setdefault("GIT_COMMITTER_EMAIL", "committer@example.com")
-            env.setdefault("GIT_COMMITTER_NAME", "C O Mitter")
-            env.setdefault("GIT_COMMITTER_DATE",
-                           "{} -0700".format(self.testing_time))
-            env.setdefault("GIT_AUTHOR_DATE",
-                           "{} -0700".format(self.testing_time))
+            kwargs["env"] = merge_dicts(self._testing_git_env,
+                                        kwargs.get("env") or {})
             if 'stderr' not in kwargs:
                 kwargs['stderr'] = subprocess.PIPE
 
@@ -307,11 +354,103 @@ class Shell(object):
 
         return self._maybe_rstrip(self.sh(*(("jf",) + args), **kwargs))
 
+    def _cat_file_batch(self, obj: str) -> Tuple[str, bytes]:
+        """
+        Look up an object with the shell's long-running
+        `git cat-file --batch` process (starting it if necessary),
+        returning its hash and contents.
+
+        Args:
+            obj: the object to look up, in any form git accepts
+                (e.g., a revision or <rev>:<path>)
+        """
+        # cat-file reads one name per line, so a newline would split this
+        # into two lookups and desync every later reply
+        if "\n" in obj:
+            raise RuntimeError("could not resolve {!r}".format(obj))
+        if self._cat_file is None:
+            self._cat_file = subprocess.Popen(
+                ("git", "cat-file", "--batch"),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                cwd=self.cwd,
+                env=(merge_dicts(dict(os.environ), self._testing_git_env)
+                     if self.testing else None),
+            )
+        assert self._cat_file.stdin is not None
+        assert self._cat_file.stdout is not None
+        self._cat_file.stdin.write(obj.encode('utf-8') + b"\n")
+        self._cat_file.stdin.flush()
+        # Either "<sha> <type> <size>" followed by the contents and a
+        # newline, or "<obj> missing" / "<obj> ambiguous".  <obj> is echoed
+        # verbatim and may itself contain spaces, so check the last field
+        # before treating the line as a hit
+        fields = self._cat_file.stdout.readline().decode().split()
+        if not fields or fields[-1] in ("missing", "ambiguous"):
+            raise RuntimeError("could not resolve {}".format(obj))
+        contents = self._cat_file.stdout.read(int(fields[2]))
+        self._cat_file.stdout.read(1)
+        return fields[0], contents
+
+    def rev_parse_batch(self, rev: str) -> str:
+        """
+        Resolve a revision to its full hash, like `git rev-parse`.
+        Lookups are answered by a single long-running `git cat-file`
+        process rather than spawning git each time, which makes this
+        much cheaper when called repeatedly.  Call close() to shut the
+        process down.
+
+        Args:
+            rev: the revision to resolve
+        """
+        return self._cat_file_batch(rev)[0]
+
+    def rev_parse_short_batch(self, rev: str) -> str:
+        """
+        Like rev_parse_batch(), but returns the abbreviated hash, like
+        `git rev-parse --short`.
+
+        Args:
+            rev: the revision to resolve
+        """
+        # NB: 7 is git's default abbreviation length; longer ones are
+        # only used in repositories far bigger than we use this for
+        return self.rev_parse_batch(rev)[:7]
+
+    def cat_file_batch(self, obj: str) -> str:
+        """
+        Return the contents of an object, like `git cat-file -p` does
+        for blobs, using the same long-running process as
+        rev_parse_batch().
+
+        Args:
+            obj: the object to read, e.g., master:README.md
+        """
+        return self._cat_file_batch(obj)[1].decode()
+
+    def close(self) -> None:
+        """
+        Shut down any long-running git processes started by this shell.
+        """
+        if self._cat_file is not None:
+            assert self._cat_file.stdin is not None
+            self._cat_file.stdin.close()
+            self._cat_file.wait()
+            assert self._cat_file.stdout is not None
+            self._cat_file.stdout.close()
+            self._cat_file = None
+
+    def _update_testing_dates(self) -> None:
+        date = "{} -0700".format(self.testing_time)
+        self._testing_git_env["GIT_COMMITTER_DATE"] = date
+        self._testing_git_env["GIT_AUTHOR_DATE"] = date
+
     def test_tick(self) -> None:
         """
         Increase the current time.  Useful when testing is True.
         """
         self.testing_time += 60
+        self._update_testing_dates()
 
     def open(self, fn: str, mode: str) -> IO[Any]:
         """
@@ -330,4 +469,6 @@ class Shell(object):
         Args:
             d: directory to change to
         """
+        # Any long-running git processes are tied to the old directory
+        self.close()
         self.cwd = os.path.join(self.cwd, d)
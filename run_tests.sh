@@ -3,5 +3,5 @@ set -ex
 isort . --check --diff
 flake8
 mypy .
-pytest --verbose
+pytest --verbose -n auto
 echo "OK"
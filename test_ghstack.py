@@ -1,6 +1,7 @@
 from __future__ import print_function
 
 import contextlib
+import copy
 import io
 import logging
 import os
@@ -8,8 +9,9 @@ import re
 import shutil
 import sys
 import tempfile
+import textwrap
 import unittest
-from typing import Dict, Iterator, List, NewType, Optional, Tuple
+from typing import Callable, Dict, Iterator, List, NewType, Optional, Tuple
 
 import expecttest
 
@@ -40,16 +42,30 @@ def captured_output() -> Iterator[Tuple[io.StringIO, io.StringIO]]:
 GH_KEEP_TMP = os.getenv('GH_KEEP_TMP')
 
 
+# Progress banners and substitutions made by the tests themselves, kept
+# apart from the command log that ghstack.shell writes to the root logger
+log = logging.getLogger(__name__)
+
+
 SubstituteRev = NewType('SubstituteRev', str)
 
 
-def strip_trailing_whitespace(text: str) -> str:
-    return re.sub(r' +$', '', text, flags=re.MULTILINE)
+def tmp_root() -> str:
+    """
+    Directory to create test repositories in.  Prefer a tmpfs (RAM
+    backed) mount when one is available, so git's file I/O never
+    touches the disk.
+    """
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK | os.X_OK):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+
+RE_TRAILING_WHITESPACE = re.compile(r' +$', re.MULTILINE)
 
 
-def indent(text: str, prefix: str) -> str:
-    return ''.join(prefix + line if line.strip() else line
-                   for line in text.splitlines(True))
+def strip_trailing_whitespace(text: str) -> str:
+    return RE_TRAILING_WHITESPACE.sub('', text)
 
 
 class TestGh(expecttest.TestCase):
@@ -58,26 +74,74 @@ class TestGh(expecttest.TestCase):
     upstream_sh: ghstack.shell.Shell
     sh: ghstack.shell.Shell
 
-    def setUp(self) -> None:
+    # Every test starts out with the same "parent" repository and a
+    # clone of it, so we build them once and give each test a copy,
+    # rather than paying for init/commit/clone on every setUp.  All
+    # repositories for the class live under tmp_dir, which is removed
+    # in one go once the class is done.
+    tmp_dir: str
+    template_dir: str
+    template_github: ghstack.github_fake.FakeGitHubEndpoint
+    template_head: GitCommitHash
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        # mkdtemp already keeps concurrent xdist workers apart; the
+        # worker id in the name says who left a directory behind in
+        # tmpfs if a worker dies before tearDownClass
+        worker = os.getenv('PYTEST_XDIST_WORKER', 'main')
+        cls.tmp_dir = tempfile.mkdtemp(prefix='ghstack-{}-'.format(worker), dir=tmp_root())
+        cls.template_dir = os.path.join(cls.tmp_dir, "template")
+
         # Set up a "parent" repository with an empty initial commit that we'll operate on
-        upstream_dir = tempfile.mkdtemp()
+        upstream_dir = os.path.join(cls.template_dir, "upstream")
+        os.makedirs(upstream_dir)
+        upstream_sh = ghstack.shell.Shell(cwd=upstream_dir, testing=True)
+        cls.template_github = ghstack.github_fake.FakeGitHubEndpoint(upstream_sh)
+        # Tests get a deep copy of template_github, which can't include
+        # a running process
+        upstream_sh.close()
+
+        local_dir = os.path.join(cls.template_dir, "local")
+        os.makedirs(local_dir)
+        sh = ghstack.shell.Shell(cwd=local_dir, testing=True)
+        sh.git("clone", upstream_dir, ".")
+        # Each test's copy of local sits next to its copy of upstream,
+        # and git resolves the relative URL from the repository root
+        # where every command runs, so no per-test rewiring is needed
+        sh.git("remote", "set-url", "origin", "../upstream")
+        cls.template_head = GitCommitHash(sh.git("rev-parse", "--short", "HEAD"))
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        if not GH_KEEP_TMP:
+            shutil.rmtree(cls.tmp_dir)
+
+    def setUp(self) -> None:
+        # Start from a copy of the template "parent" repository (with an
+        # empty initial commit) and its clone
+        test_dir = os.path.join(self.tmp_dir, self._testMethodName)
+        upstream_dir = os.path.join(test_dir, "upstream")
+        local_dir = os.path.join(test_dir, "local")
         if GH_KEEP_TMP:
             self.addCleanup(lambda: print("upstream_dir preserved at: {}".format(upstream_dir)))
-        else:
-            self.addCleanup(lambda: shutil.rmtree(upstream_dir))
+            self.addCleanup(lambda: print("local_dir preserved at: {}".format(local_dir)))
+
+        shutil.copytree(os.path.join(self.template_dir, "upstream"), upstream_dir)
         self.upstream_sh = ghstack.shell.Shell(cwd=upstream_dir, testing=True)
-        self.github = ghstack.github_fake.FakeGitHubEndpoint(self.upstream_sh)
+        self.addCleanup(self.upstream_sh.close)
+        github = copy.deepcopy(self.template_github)
+        github.state.upstream_sh = self.upstream_sh
+        self.github = github
 
-        local_dir = tempfile.mkdtemp()
-        if GH_KEEP_TMP:
-            self.addCleanup(lambda: print("local_dir preserved at: {}".format(local_dir)))
-        else:
-            self.addCleanup(lambda: shutil.rmtree(local_dir))
+        shutil.copytree(os.path.join(self.template_dir, "local"), local_dir)
         self.sh = ghstack.shell.Shell(cwd=local_dir, testing=True)
-        self.sh.git("clone", upstream_dir, ".")
+        self.addCleanup(self.sh.close)
 
         self.rev_map = {}
-        self.substituteRev(GitCommitHash("HEAD"), SubstituteRev("rINI0"))
+        # The initial commit is the same for every test, so there's no
+        # need to resolve it again
+        self.substituteHash(self.template_head, "rINI0")
 
     def writeFileAndAdd(self, filename: str, contents: str) -> None:
         with self.sh.open(filename, "w") as f:
@@ -87,11 +151,21 @@ class TestGh(expecttest.TestCase):
     def lookupRev(self, substitute: str) -> GitCommitHash:
         return self.rev_map[SubstituteRev(substitute)]
 
+    def amendMessage(self, f: Callable[[str], str]) -> None:
+        # Equivalent to a filter-branch --msg-filter on HEAD, without
+        # filter-branch's per-invocation setup and warning delay
+        msg = self.sh.git("log", "-1", "--format=%B", "HEAD") + "\n"
+        self.sh.git("commit", "--amend", "--allow-empty", "--cleanup=verbatim",
+                    "-F", "-", input=f(msg))
+
     def substituteRev(self, rev: str, substitute: str) -> None:
         # short doesn't really have to be here if we do substituteRev
-        h = GitCommitHash(self.sh.git("rev-parse", "--short", rev))
+        h = GitCommitHash(self.sh.rev_parse_short_batch(rev))
+        self.substituteHash(h, substitute)
+
+    def substituteHash(self, h: GitCommitHash, substitute: str) -> None:
         self.rev_map[SubstituteRev(substitute)] = h
-        print("substituteRev: {} = {}".format(substitute, h))
+        log.info("substituteRev: {} = {}".format(substitute, h))
         self.substituteExpected(h, substitute)
 
     # NB: returns earliest first
@@ -149,13 +223,16 @@ class TestGh(expecttest.TestCase):
           }
         """)
         prs = []
-        refs = ""
         for pr in r['data']['repository']['pullRequests']['nodes']:
-            pr['body'] = indent(pr['body'].replace('\r', ''), '    ')
+            pr['body'] = textwrap.indent(pr['body'].replace('\r', ''), '    ')
+            # NB: git log can't report several ranges separately in one
+            # go, so this stays one call per PR
             pr['commits'] = self.upstream_sh.git("log", "--reverse", "--pretty=format:%h %s", pr["baseRefName"] + ".." + pr["headRefName"])
-            pr['commits'] = indent(pr['commits'], '     * ')
-            prs.append("#{number} {title} ({headRefName} -> {baseRefName})\n\n"
-                       "{body}\n\n{commits}\n\n".format(**pr))
+            pr['commits'] = textwrap.indent(pr['commits'], '     * ')
+            prs.append(f"#{pr['number']} {pr['title']} ({pr['headRefName']} -> {pr['baseRefName']})\n\n"
+                       f"{pr['body']}\n\n{pr['commits']}\n\n")
+        refs = ""
+        if prs:
             # TODO: Use of git --graph here is a bit of a loaded
             # footgun, because git doesn't really give any guarantees
             # about what the graph should look like.  So there isn't
@@ -163,16 +240,16 @@ class TestGh(expecttest.TestCase):
             # on multiple test runs.  We'll have to reimplement this
             # ourselves to do it right.
             refs = self.upstream_sh.git("log", "--graph", "--oneline", "--branches=gh/*/*/head", "--decorate")
-        return "".join(prs) + "Repository state:\n\n" + indent(strip_trailing_whitespace(refs), '    ') + "\n\n"
+        return "".join(prs) + "Repository state:\n\n" + textwrap.indent(strip_trailing_whitespace(refs), '    ') + "\n\n"
 
     # ------------------------------------------------------------------------- #
 
     def test_simple(self) -> None:
-        print("####################")
-        print("### test_simple")
-        print("###")
+        log.info("####################")
+        log.info("### test_simple")
+        log.info("###")
 
-        print("### First commit")
+        log.info("### First commit")
         self.writeFileAndAdd("a", "asdf")
         self.sh.git("commit", "-m", "Commit 1\n\nThis is my first commit")
         self.sh.test_tick()
@@ -199,8 +276,8 @@ Repository state:
         # Just to test what happens if we use those branches
         self.sh.git("checkout", "gh/ezyang/1/orig")
 
-        print("###")
-        print("### Second commit")
+        log.info("###")
+        log.info("### Second commit")
         self.writeFileAndAdd("b", "asdf")
         self.sh.git("commit", "-m", "Commit 2\n\nThis is my second commit")
         self.sh.test_tick()
@@ -239,9 +316,9 @@ Repository state:
     # ------------------------------------------------------------------------- #
 
     def test_when_malform_gh_branch_exist(self) -> None:
-        print("####################")
-        print("### test_when_malform_gh_branch_exist")
-        print("###")
+        log.info("####################")
+        log.info("### test_when_malform_gh_branch_exist")
+        log.info("###")
         # Ensure that even if there are gh/{} branch that doesn't conform with
         # ghstack naming convension, it still works
         self.sh.git("checkout", "-b", "gh/ezyang/malform")
@@ -251,7 +328,7 @@ Repository state:
         self.sh.git("checkout", "master")
 
         # It is doing same thing as test_simple from this point forward.
-        print("### First commit")
+        log.info("### First commit")
         self.writeFileAndAdd("a", "asdf")
         self.sh.git("commit", "-m", "Commit 1\n\nThis is my first commit")
         self.sh.test_tick()
@@ -274,8 +351,8 @@ Repository state:
     * rINI0 (HEAD -> master, gh/ezyang/non_int/head, gh/ezyang/malform, gh/ezyang/1/base) Initial commit
 
 ''')
-        print("###")
-        print("### Second commit")
+        log.info("###")
+        log.info("### Second commit")
         self.writeFileAndAdd("b", "asdf")
         self.sh.git("commit", "-m", "Commit 2\n\nThis is my second commit")
         self.sh.test_tick()
@@ -314,11 +391,11 @@ Repository state:
     # ------------------------------------------------------------------------- #
 
     def test_empty_commit(self) -> None:
-        print("####################")
-        print("### test_empty_commit")
-        print("###")
+        log.info("####################")
+        log.info("### test_empty_commit")
+        log.info("###")
 
-        print("### Empty commit")
+        log.info("### Empty commit")
         self.sh.git("commit", "--allow-empty", "-m", "Commit 1\n\nThis is my first commit")
         self.writeFileAndAdd("bar", "baz")
         self.sh.git("commit", "-m", "Commit 2")
@@ -385,9 +462,9 @@ Pull Request resolved: https://github.com/pytorch/pytorch/pull/500''')
     # ------------------------------------------------------------------------- #
 
     def test_commit_amended_to_empty(self) -> None:
-        print("####################")
-        print("### test_empty_commit")
-        print("###")
+        log.info("####################")
+        log.info("### test_empty_commit")
+        log.info("###")
 
         self.writeFileAndAdd("bar", "baz")
         self.sh.git("commit", "-m", "Commit 1\n\nThis is my first commit")
@@ -437,10 +514,10 @@ Repository state:
     # ------------------------------------------------------------------------- #
 
     def test_amend(self) -> None:
-        print("####################")
-        print("### test_amend")
-        print("###")
-        print("### First commit")
+        log.info("####################")
+        log.info("### test_amend")
+        log.info("###")
+        log.info("### First commit")
         self.writeFileAndAdd("file1.txt", "A")
         self.sh.git("commit", "-m", "Commit 1\n\nA commit with an A")
         self.sh.test_tick()
@@ -464,8 +541,8 @@ Repository state:
     * rINI0 (HEAD -> master, gh/ezyang/1/base) Initial commit
 
 ''')
-        print("###")
-        print("### Amend the commit")
+        log.info("###")
+        log.info("### Amend the commit")
         self.writeFileAndAdd("file1.txt", "ABBA")
         # Can't use -m here, it will clobber the metadata
         self.sh.git("commit", "--amend")
@@ -495,10 +572,10 @@ Repository state:
     # ------------------------------------------------------------------------- #
 
     def test_amend_message_only(self) -> None:
-        print("####################")
-        print("### test_amend")
-        print("###")
-        print("### First commit")
+        log.info("####################")
+        log.info("### test_amend")
+        log.info("###")
+        log.info("### First commit")
         self.writeFileAndAdd("file1.txt", "A")
         self.sh.git("commit", "-m", "Commit 1\n\nA commit with an A")
         self.sh.test_tick()
@@ -522,10 +599,10 @@ Repository state:
     * rINI0 (HEAD -> master, gh/ezyang/1/base) Initial commit
 
 ''')
-        print("###")
-        print("### Amend the commit")
-        # Can't use -m here, it will clobber the metadata
-        self.sh.git("filter-branch", "-f", "--msg-filter", "cat && echo 'blargle'", "HEAD~..HEAD")
+        log.info("###")
+        log.info("### Amend the commit")
+        # Can't use a fresh -m here, it will clobber the metadata
+        self.amendMessage(lambda msg: msg + "blargle\n")
         self.substituteRev("HEAD", "rCOM2")
         self.sh.test_tick()
         self.gh('Update A', no_skip=True)
@@ -552,18 +629,18 @@ Repository state:
     # ------------------------------------------------------------------------- #
 
     def test_amend_out_of_date(self) -> None:
-        print("####################")
-        print("### test_amend_out_of_date")
-        print("###")
-        print("### First commit")
+        log.info("####################")
+        log.info("### test_amend_out_of_date")
+        log.info("###")
+        log.info("### First commit")
         self.writeFileAndAdd("file1.txt", "A")
         self.sh.git("commit", "-m", "Commit 1\n\nA commit with an A")
         self.sh.test_tick()
         self.gh('Initial 1')
         old_head = self.sh.git("rev-parse", "HEAD")
 
-        print("###")
-        print("### Amend the commit")
+        log.info("###")
+        log.info("### Amend the commit")
         self.writeFileAndAdd("file1.txt", "ABBA")
         # Can't use -m here, it will clobber the metadata
         self.sh.git("commit", "--amend")
@@ -581,15 +658,15 @@ Repository state:
     # ------------------------------------------------------------------------- #
 
     def test_multi(self) -> None:
-        print("####################")
-        print("### test_multi")
-        print("###")
-        print("### First commit")
+        log.info("####################")
+        log.info("### test_multi")
+        log.info("###")
+        log.info("### First commit")
         self.writeFileAndAdd("file1.txt", "A")
         self.sh.git("commit", "-m", "Commit 1\n\nA commit with an A")
         self.sh.test_tick()
-        print("###")
-        print("### Second commit")
+        log.info("###")
+        log.info("### Second commit")
         self.writeFileAndAdd("file2.txt", "B")
         self.sh.git("commit", "-m", "Commit 2\n\nA commit with a B")
         self.sh.test_tick()
@@ -632,10 +709,10 @@ Repository state:
     # ------------------------------------------------------------------------- #
 
     def test_amend_top(self) -> None:
-        print("####################")
-        print("### test_amend_top")
-        print("###")
-        print("### First commit")
+        log.info("####################")
+        log.info("### test_amend_top")
+        log.info("###")
+        log.info("### First commit")
         self.writeFileAndAdd("file1.txt", "A")
         self.sh.git("commit", "-m", "Commit 1\n\nA commit with an A")
         self.sh.test_tick()
@@ -643,8 +720,8 @@ Repository state:
         self.substituteRev("HEAD", "rCOM1")
         self.substituteRev("origin/gh/ezyang/1/head", "rMRG1")
 
-        print("###")
-        print("### Second commit")
+        log.info("###")
+        log.info("### Second commit")
         self.writeFileAndAdd("file2.txt", "B")
         self.sh.git("commit", "-m", "Commit 2\n\nA commit with a B")
         self.sh.test_tick()
@@ -680,8 +757,8 @@ Repository state:
     * rINI0 (HEAD -> master, gh/ezyang/1/base) Initial commit
 
 ''')
-        print("###")
-        print("### Amend the top commit")
+        log.info("###")
+        log.info("### Amend the top commit")
         self.writeFileAndAdd("file2.txt", "BAAB")
         # Can't use -m here, it will clobber the metadata
         self.sh.git("commit", "--amend")
@@ -723,10 +800,10 @@ Repository state:
     # ------------------------------------------------------------------------- #
 
     def test_amend_bottom(self) -> None:
-        print("####################")
-        print("### test_amend_bottom")
-        print("###")
-        print("### First commit")
+        log.info("####################")
+        log.info("### test_amend_bottom")
+        log.info("###")
+        log.info("### First commit")
         self.writeFileAndAdd("file1.txt", "A")
         self.sh.git("commit", "-m", "Commit 1\n\nA commit with an A")
         self.sh.test_tick()
@@ -734,8 +811,8 @@ Repository state:
         self.substituteRev("HEAD", "rCOM1")
         self.substituteRev("origin/gh/ezyang/1/head", "rMRG1")
 
-        print("###")
-        print("### Second commit")
+        log.info("###")
+        log.info("### Second commit")
         self.writeFileAndAdd("file2.txt", "B")
         self.sh.git("commit", "-m", "Commit 2\n\nA commit with a B")
         self.sh.test_tick()
@@ -772,8 +849,8 @@ Repository state:
 
 ''')
 
-        print("###")
-        print("### Amend the bottom commit")
+        log.info("###")
+        log.info("### Amend the bottom commit")
         self.sh.git("checkout", "HEAD~")
         self.writeFileAndAdd("file1.txt", "ABBA")
         # Can't use -m here, it will clobber the metadata
@@ -813,8 +890,8 @@ Repository state:
 
 ''')
 
-        print("###")
-        print("### Restack the top commit")
+        log.info("###")
+        log.info("### Restack the top commit")
         self.sh.git("cherry-pick", self.lookupRev("rCOM2"))
         self.sh.test_tick()
         self.gh('Update B')
@@ -861,10 +938,10 @@ Repository state:
     # ------------------------------------------------------------------------- #
 
     def test_amend_all(self) -> None:
-        print("####################")
-        print("### test_amend_all")
-        print("###")
-        print("### First commit")
+        log.info("####################")
+        log.info("### test_amend_all")
+        log.info("###")
+        log.info("### First commit")
         self.writeFileAndAdd("file1.txt", "A")
         self.sh.git("commit", "-m", "Commit 1\n\nA commit with an A")
         self.sh.test_tick()
@@ -872,8 +949,8 @@ Repository state:
         self.substituteRev("HEAD", "rCOM1")
         self.substituteRev("origin/gh/ezyang/1/head", "rMRG1")
 
-        print("###")
-        print("### Second commit")
+        log.info("###")
+        log.info("### Second commit")
         self.writeFileAndAdd("file2.txt", "B")
         self.sh.git("commit", "-m", "Commit 2\n\nA commit with a B")
         self.sh.test_tick()
@@ -910,8 +987,8 @@ Repository state:
 
 ''')
 
-        print("###")
-        print("### Amend the commits")
+        log.info("###")
+        log.info("### Amend the commits")
         self.sh.git("checkout", "HEAD~")
         self.writeFileAndAdd("file1.txt", "ABBA")
         # Can't use -m here, it will clobber the metadata
@@ -969,13 +1046,13 @@ Repository state:
     # ------------------------------------------------------------------------- #
 
     def test_rebase(self) -> None:
-        print("####################")
-        print("### test_rebase")
+        log.info("####################")
+        log.info("### test_rebase")
 
         self.sh.git("checkout", "-b", "feature")
 
-        print("###")
-        print("### First commit")
+        log.info("###")
+        log.info("### First commit")
         self.writeFileAndAdd("file1.txt", "A")
         self.sh.git("commit", "-m", "Commit 1\n\nA commit with an A")
         self.sh.test_tick()
@@ -983,8 +1060,8 @@ Repository state:
         self.substituteRev("HEAD", "rCOM1")
         self.substituteRev("origin/gh/ezyang/1/head", "rMRG1")
 
-        print("###")
-        print("### Second commit")
+        log.info("###")
+        log.info("### Second commit")
         self.writeFileAndAdd("file2.txt", "B")
         self.sh.git("commit", "-m", "Commit 2\n\nA commit with a B")
         self.sh.test_tick()
@@ -1021,8 +1098,8 @@ Repository state:
 
 ''')
 
-        print("###")
-        print("### Push master forward")
+        log.info("###")
+        log.info("### Push master forward")
         self.sh.git("checkout", "master")
         self.writeFileAndAdd("master.txt", "M")
         self.sh.git("commit", "-m", "Master commit 1\n\nA commit with a M")
@@ -1030,8 +1107,8 @@ Repository state:
         self.sh.test_tick()
         self.sh.git("push", "origin", "master")
 
-        print("###")
-        print("### Rebase the commits")
+        log.info("###")
+        log.info("### Rebase the commits")
         self.sh.git("checkout", "feature")
         self.sh.git("rebase", "origin/master")
 
@@ -1093,13 +1170,13 @@ Repository state:
     # ------------------------------------------------------------------------- #
 
     def test_cherry_pick(self) -> None:
-        print("####################")
-        print("### test_cherry_pick")
+        log.info("####################")
+        log.info("### test_cherry_pick")
 
         self.sh.git("checkout", "-b", "feature")
 
-        print("###")
-        print("### First commit")
+        log.info("###")
+        log.info("### First commit")
         self.writeFileAndAdd("file1.txt", "A")
         self.sh.git("commit", "-m", "Commit 1\n\nA commit with an A")
         self.sh.test_tick()
@@ -1107,8 +1184,8 @@ Repository state:
         self.substituteRev("HEAD", "rCOM1")
         self.substituteRev("origin/gh/ezyang/1/head", "rMRG1")
 
-        print("###")
-        print("### Second commit")
+        log.info("###")
+        log.info("### Second commit")
         self.writeFileAndAdd("file2.txt", "B")
         self.sh.git("commit", "-m", "Commit 2\n\nA commit with a B")
         self.sh.test_tick()
@@ -1145,8 +1222,8 @@ Repository state:
 
 ''')
 
-        print("###")
-        print("### Push master forward")
+        log.info("###")
+        log.info("### Push master forward")
         self.sh.git("checkout", "master")
         self.writeFileAndAdd("master.txt", "M")
         self.sh.git("commit", "-m", "Master commit 1\n\nA commit with a M")
@@ -1154,8 +1231,8 @@ Repository state:
         self.sh.test_tick()
         self.sh.git("push", "origin", "master")
 
-        print("###")
-        print("### Cherry-pick the second commit")
+        log.info("###")
+        log.info("### Cherry-pick the second commit")
         self.sh.git("cherry-pick", "feature")
 
         self.substituteRev("HEAD", "rCOM2A")
@@ -1305,8 +1382,8 @@ Repository state:
     def test_no_clobber(self) -> None:
         # Check that we don't clobber changes to PR description or title
 
-        print("####################")
-        print("### test_no_clobber")
+        log.info("####################")
+        log.info("### test_no_clobber")
         self.writeFileAndAdd("b", "asdf")
         self.sh.git("commit", "-m", "Commit 1\n\nOriginal message")
         self.sh.test_tick()
@@ -1332,8 +1409,8 @@ Repository state:
 
 ''')
 
-        print("###")
-        print("### Amend the PR")
+        log.info("###")
+        log.info("### Amend the PR")
         self.github.patch("repos/pytorch/pytorch/pulls/500",
                           body="""\
 Stack:
@@ -1359,8 +1436,8 @@ Repository state:
 
 ''')
 
-        print("###")
-        print("### Submit an update")
+        log.info("###")
+        log.info("### Submit an update")
         self.writeFileAndAdd("file1.txt", "A")
         self.sh.git("commit", "--amend")
         self.sh.test_tick()
@@ -1394,8 +1471,8 @@ Repository state:
         # In some situations, GitHub will replace your newlines with
         # \r\n.  Check we handle this correctly.
 
-        print("####################")
-        print("### test_no_clobber_carriage_returns")
+        log.info("####################")
+        log.info("### test_no_clobber_carriage_returns")
         self.writeFileAndAdd("b", "asdf")
         self.sh.git("commit", "-m", "Commit 1\n\nOriginal message")
         self.sh.test_tick()
@@ -1421,8 +1498,8 @@ Repository state:
 
 ''')
 
-        print("###")
-        print("### Amend the PR")
+        log.info("###")
+        log.info("### Amend the PR")
         self.github.patch("repos/pytorch/pytorch/pulls/500",
                           body="""\
 Stack:
@@ -1431,8 +1508,8 @@ Stack:
 Directly updated message body""".replace('\n', '\r\n'),
                           title="Directly updated title")
 
-        print("###")
-        print("### Submit a new commit")
+        log.info("###")
+        log.info("### Submit a new commit")
         self.writeFileAndAdd("file1.txt", "A")
         self.sh.git("commit", "-m", "Commit 2")
         self.sh.test_tick()
@@ -1494,8 +1571,8 @@ Repository state:
     def test_update_fields(self) -> None:
         # Check that we do clobber fields when explicitly asked
 
-        print("####################")
-        print("### test_update_fields")
+        log.info("####################")
+        log.info("### test_update_fields")
         self.writeFileAndAdd("b", "asdf")
         self.sh.git("commit", "-m", "Commit 1\n\nOriginal message")
         self.sh.test_tick()
@@ -1521,8 +1598,8 @@ Repository state:
 
 ''')
 
-        print("###")
-        print("### Amend the PR")
+        log.info("###")
+        log.info("### Amend the PR")
         self.github.patch("repos/pytorch/pytorch/pulls/500",
                           body="Directly updated message body",
                           title="Directly updated title")
@@ -1541,8 +1618,8 @@ Repository state:
 
 ''')
 
-        print("###")
-        print("### Force update fields")
+        log.info("###")
+        log.info("### Force update fields")
         self.gh('Update 1', update_fields=True)
         self.sh.test_tick()
 
@@ -1570,8 +1647,8 @@ Repository state:
     def test_update_fields_preserves_commit_message(self) -> None:
         # Check that we do clobber fields when explicitly asked
 
-        print("####################")
-        print("### test_update_fields")
+        log.info("####################")
+        log.info("### test_update_fields")
         self.writeFileAndAdd("b", "asdf")
         self.sh.git("commit", "-m", "Commit 1\n\nOriginal message")
         self.sh.test_tick()
@@ -1597,9 +1674,9 @@ Repository state:
 
 ''')
 
-        print("###")
-        print("### Amend the commit")
-        self.sh.git('filter-branch', '--msg-filter', 'echo Amended && cat', 'HEAD~..HEAD')
+        log.info("###")
+        log.info("### Amend the commit")
+        self.amendMessage(lambda msg: "Amended\n" + msg)
         self.gh('Update 1', update_fields=True)
         self.sh.test_tick()
 
@@ -1631,7 +1708,7 @@ Repository state:
     def test_update_fields_preserve_differential_revision(self) -> None:
         # Check that Differential Revision is preserved
 
-        logging.info("### test_update_fields_preserve_differential_revision")
+        log.info("### test_update_fields_preserve_differential_revision")
         self.writeFileAndAdd("b", "asdf")
         self.sh.git("commit", "-m", "Commit 1\n\nOriginal message")
         self.sh.test_tick()
@@ -1657,7 +1734,7 @@ Repository state:
 
 ''')
 
-        logging.info("### Amend the PR")
+        log.info("### Amend the PR")
         body = """\n
 Directly updated message body
 
@@ -1686,7 +1763,7 @@ Repository state:
 
 ''')
 
-        logging.info("### Force update fields")
+        log.info("### Force update fields")
         self.gh('Update 1', update_fields=True)
         self.sh.test_tick()
 
@@ -1719,8 +1796,8 @@ Repository state:
 
         self.sh.git("checkout", "-b", "feature")
 
-        print("###")
-        print("### First commit")
+        log.info("###")
+        log.info("### First commit")
         self.writeFileAndAdd("file1.txt", "A")
         self.sh.git("commit", "-m", "Commit 1\n\nA commit with an A")
         self.sh.test_tick()
@@ -1728,8 +1805,8 @@ Repository state:
         self.substituteRev("HEAD", "rCOM1")
         self.substituteRev("origin/gh/ezyang/1/head", "rMRG1")
 
-        print("###")
-        print("### Second commit")
+        log.info("###")
+        log.info("### Second commit")
         self.writeFileAndAdd("file2.txt", "B")
         self.sh.git("commit", "-m", "Commit 2\n\nA commit with a B")
         self.sh.test_tick()
@@ -1766,12 +1843,12 @@ Repository state:
 
 ''')
 
-        print("###")
-        print("### Delete first commit")
+        log.info("###")
+        log.info("### Delete first commit")
         self.sh.git("checkout", "master")
 
-        print("###")
-        print("### Cherry-pick the second commit")
+        log.info("###")
+        log.info("### Cherry-pick the second commit")
         self.sh.git("cherry-pick", "feature")
 
         self.substituteRev("HEAD", "rCOM2A")
@@ -1911,8 +1988,8 @@ rINI0 Initial commit''')
         self.gh('Update')
 
         self.gh_land(pr_url)
-        self.assertExpectedInline(self.upstream_sh.git("show", "master:file1.txt"), '''ABBA''')
-        self.assertExpectedInline(self.upstream_sh.git("show", "master:file2.txt"), '''B''')
+        self.assertExpectedInline(self.upstream_sh.cat_file_batch("master:file1.txt"), '''ABBA''')
+        self.assertExpectedInline(self.upstream_sh.cat_file_batch("master:file2.txt"), '''B''')
 
     # ------------------------------------------------------------------------- #
 
@@ -1944,8 +2021,8 @@ rINI0 Initial commit''')
     # ------------------------------------------------------------------------- #
 
     def test_unlink(self) -> None:
-        print("###")
-        print("### First commit")
+        log.info("###")
+        log.info("### First commit")
         self.writeFileAndAdd("file1.txt", "A")
         self.sh.git("commit", "-m", "Commit 1\n\nA commit with an A")
         self.sh.test_tick()
@@ -2121,5 +2198,5 @@ rINI0 Initial commit''')
 
 
 if __name__ == '__main__':
-    logging.basicConfig(level=logging.DEBUG, format='%(message)s')
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     unittest.main()